@@ -1,3 +1,10 @@
 from .builder import DatasetBuilder
+from .budget import AdaptiveBudget, BudgetExhausted, BudgetGovernor, BudgetPlan
+from .writers import JsonlSink, SCHEMAS, convert_jsonl
+from .planner import DEFAULT_RATE_LIMITS, JobPlan, RateLimits, plan_files, plan_job
 
-__all__ = ["DatasetBuilder"]
+__all__ = [
+	"DatasetBuilder", "AdaptiveBudget", "BudgetPlan", "BudgetGovernor", "BudgetExhausted",
+	"JsonlSink", "SCHEMAS", "convert_jsonl",
+	"RateLimits", "DEFAULT_RATE_LIMITS", "JobPlan", "plan_job", "plan_files",
+]
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.services.prompts import QA_SYSTEM_PROMPT, build_qa_user_prompt
+
+
+def estimate_tokens(text: str) -> int:
+	"""Rough token count (~4 characters per token), good enough for budgeting."""
+	return max(1, math.ceil(len(text) / 4))
+
+
+@dataclass
+class BudgetPlan:
+	num_pairs: int
+	max_tokens: int
+
+
+class _CompletionHistogram:
+	"""Fixed-width histogram of completion tokens per QA pair."""
+
+	def __init__(self, bucket_width: int, num_buckets: int) -> None:
+		self._width = bucket_width
+		self._counts: List[int] = [0] * num_buckets
+		self.total = 0
+
+	def add(self, tokens: int) -> None:
+		idx = min(tokens // self._width, len(self._counts) - 1)
+		self._counts[idx] += 1
+		self.total += 1
+
+	def percentile(self, q: float) -> int:
+		target = q * self.total
+		seen = 0
+		for idx, count in enumerate(self._counts):
+			seen += count
+			if seen >= target:
+				# Upper edge of the bucket so the estimate never undershoots it
+				return (idx + 1) * self._width
+		return len(self._counts) * self._width
+
+
+# Expected completion tokens per QA pair (JSON scaffolding included) until real usage is observed
+DEFAULT_PAIR_TOKENS = 170
+
+
+class AdaptiveBudget:
+	"""Picks num_pairs and max_tokens per chunk.
+
+	``num_pairs`` scales with the chunk's token length: ``pairs_per_full_chunk``
+	pairs for a chunk of ``full_chunk_chars`` characters, proportionally fewer for
+	shorter ones. ``max_tokens`` is sized from a per-model histogram of the
+	provider-reported completion tokens per pair, with headroom that grows after
+	truncations (finish reason "length" / "MAX_TOKENS") and shrinks back while
+	responses fit.
+	"""
+
+	_MIN_SAMPLES = 5
+	_BASE_HEADROOM = 1.15
+	_MAX_HEADROOM = 3.0
+
+	def __init__(self, *, pairs_per_full_chunk: int = 3, full_chunk_chars: int = 2000,
+				 max_pairs: int = 10, default_pair_tokens: int = DEFAULT_PAIR_TOKENS, percentile: float = 0.9,
+				 min_tokens: int = 256, max_tokens: int = 4096) -> None:
+		self._pairs_per_full_chunk = max(1, pairs_per_full_chunk)
+		self._full_chunk_tokens = estimate_tokens("x" * full_chunk_chars)
+		self._max_pairs = max(1, max_pairs)
+		self._default_pair_tokens = default_pair_tokens
+		self._percentile = percentile
+		self._min_tokens = min_tokens
+		self._max_tokens = max_tokens
+		self._histograms: Dict[str, _CompletionHistogram] = {}
+		self._headroom: Dict[str, float] = {}
+
+	def plan(self, chunk: str, *, model: Optional[str] = None) -> BudgetPlan:
+		key = model or ""
+		ratio = estimate_tokens(chunk) / self._full_chunk_tokens
+		num_pairs = round(self._pairs_per_full_chunk * ratio)
+		num_pairs = min(max(num_pairs, 1), self._max_pairs)
+
+		per_pair = self.pair_tokens(model)
+		max_tokens = math.ceil(per_pair * num_pairs * self._headroom.get(key, self._BASE_HEADROOM))
+		max_tokens = min(max(max_tokens, self._min_tokens), self._max_tokens)
+		# If even the ceiling cannot fit the pairs, ask for fewer rather than get truncated
+		while num_pairs > 1 and per_pair * num_pairs > max_tokens:
+			num_pairs -= 1
+		return BudgetPlan(num_pairs=num_pairs, max_tokens=max_tokens)
+
+	def observe(self, *, model: Optional[str] = None, num_pairs: int, completion_tokens: int,
+				truncated: bool = False) -> None:
+		"""Record one call's reported completion tokens for the ``num_pairs`` it asked for."""
+		key = model or ""
+		headroom = self._headroom.get(key, self._BASE_HEADROOM)
+		if truncated:
+			# A cut-off response only gives a lower bound on its length, so it is not sampled
+			self._headroom[key] = min(headroom * 1.5, self._MAX_HEADROOM)
+			return
+		self._headroom[key] = max(headroom * 0.95, self._BASE_HEADROOM)
+		hist = self._histograms.setdefault(key, _CompletionHistogram(bucket_width=16, num_buckets=128))
+		hist.add(math.ceil(completion_tokens / max(num_pairs, 1)))
+
+	def pair_tokens(self, model: Optional[str] = None) -> int:
+		"""Completion tokens to budget per pair: the observed percentile, or the default until enough samples."""
+		hist = self._histograms.get(model or "")
+		if hist is None or hist.total < self._MIN_SAMPLES:
+			return self._default_pair_tokens
+		return hist.percentile(self._percentile)
+
+
+def estimate_prompt_tokens(text: str, num_pairs: int) -> int:
+	"""Estimated prompt tokens for one QA call, built from the services' real prompt templates."""
+	return estimate_tokens(QA_SYSTEM_PROMPT) + estimate_tokens(build_qa_user_prompt(text, num_pairs))
+
+
+class BudgetExhausted(RuntimeError):
+	"""Raised before a call that would exceed the BudgetGovernor's cap."""
+
+
+class BudgetGovernor:
+	"""Cap on calls and/or total tokens for one run.
+
+	``reserve`` is checked before every call against the estimated prompt tokens
+	plus the full ``max_tokens`` reservation. The prompt estimate is scaled by the
+	worst reported/estimated prompt ratio seen so far, so text that tokenizes
+	denser than ~4 chars/token (code, non-English) is accounted for once observed.
+	The first call has no ratio yet, so a cap can only be overshot by a prompt that
+	tokenizes denser than every earlier one. ``allowed_retries`` keeps a call's HTTP
+	retries within the remaining call allowance, and ``record`` books the
+	provider-reported usage with every attempt. When the builder stops on
+	``BudgetExhausted`` it sets ``resume_chunk`` to the first chunk that was not
+	processed; pass it back as ``start_chunk`` to continue.
+	"""
+
+	def __init__(self, *, max_tokens: Optional[int] = None, max_calls: Optional[int] = None) -> None:
+		self.max_tokens = max_tokens
+		self.max_calls = max_calls
+		self.tokens_used = 0
+		self.calls_made = 0
+		self.resume_chunk: Optional[int] = None
+		self._prompt_ratio = 1.0
+
+	@property
+	def exhausted(self) -> bool:
+		return self.resume_chunk is not None
+
+	def reserve(self, prompt_tokens: int, max_completion_tokens: int) -> None:
+		"""Raise BudgetExhausted unless a call with this estimated prompt fits the remaining budget."""
+		if self.max_calls is not None and self.calls_made >= self.max_calls:
+			raise BudgetExhausted(f"Call cap of {self.max_calls} reached")
+		expected_prompt = math.ceil(prompt_tokens * self._prompt_ratio)
+		if self.max_tokens is not None and self.tokens_used + expected_prompt + max_completion_tokens > self.max_tokens:
+			raise BudgetExhausted(f"Token cap of {self.max_tokens} reached ({self.tokens_used} used)")
+
+	def allowed_retries(self, default: int = 3) -> int:
+		"""HTTP retries the next call may use without exceeding the call cap."""
+		if self.max_calls is None:
+			return default
+		return max(0, min(default, self.max_calls - self.calls_made - 1))
+
+	def record(self, prompt_tokens: int, completion_tokens: int, *, calls: int = 1,
+			   estimated_prompt_tokens: Optional[int] = None) -> None:
+		self.calls_made += calls
+		self.tokens_used += prompt_tokens + completion_tokens
+		if estimated_prompt_tokens:
+			self._prompt_ratio = max(self._prompt_ratio, prompt_tokens / estimated_prompt_tokens)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import json
-from typing import Iterable, List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 
-from src.services.base import LLMService
+from src.services.base import LLMService, QAResult
+from src.dataset.budget import (
+	AdaptiveBudget, BudgetExhausted, BudgetGovernor, estimate_prompt_tokens, estimate_tokens,
+)
+from src.dataset.writers import JsonlSink
 
 
 def chunk_text(text: str, max_chars: int = 2000) -> List[str]:
@@ -27,30 +30,96 @@ def chunk_text(text: str, max_chars: int = 2000) -> List[str]:
 
 
 class DatasetBuilder:
-	def __init__(self, llm: LLMService) -> None:
+	def __init__(self, llm: LLMService, *, budget: AdaptiveBudget | None = None,
+				 governor: BudgetGovernor | None = None) -> None:
 		self._llm = llm
+		self._budget = budget
+		self._governor = governor
 
-	def build_qa_jsonl(self, docs: Iterable[Tuple[str, str]], *, num_pairs_per_chunk: int = 3,
-					  model: str | None = None, user_prompt: str | None = None) -> List[dict]:
-		records: List[dict] = []
+	def synthesize_chunk(self, chunk: str, *, num_pairs: int = 3, model: str | None = None,
+						 user_prompt: str | None = None) -> List[dict]:
+		# If a custom prompt is provided, use it literally with the chunk injected at the end.
+		text = f"{user_prompt}\n\nTEXT:\n{chunk}" if user_prompt else chunk
+		result = self._call(chunk, text, num_pairs=num_pairs, model=model)
+		if result.completion.truncated and not result.pairs and self._budget is not None:
+			# Nothing salvageable from the cut-off response: retry once with the plan widened by observe()
+			result = self._call(chunk, text, num_pairs=num_pairs, model=model)
+		return [{"input": pair["input"], "output": pair["output"]} for pair in result.pairs]
+
+	def _call(self, chunk: str, text: str, *, num_pairs: int, model: str | None) -> QAResult:
+		# With a budget, num_pairs/max_tokens are sized from the chunk itself, not the prompt around it.
+		max_tokens = 1024
+		if self._budget is not None:
+			plan = self._budget.plan(chunk, model=model)
+			num_pairs, max_tokens = plan.num_pairs, plan.max_tokens
+		estimated_prompt = prompt_tokens = estimate_prompt_tokens(text, num_pairs)
+		retries = 3
+		if self._governor is not None:
+			self._governor.reserve(estimated_prompt, max_tokens)
+			retries = self._governor.allowed_retries(retries)
+		result = self._llm.synthesize_qa(text, model=model, num_pairs=num_pairs, max_tokens=max_tokens,
+										 retries=retries)
+		# Book what the provider reports; estimates only stand in when it omits usage
+		completion_tokens = result.completion.completion_tokens
+		if completion_tokens is None:
+			completion_tokens = estimate_tokens(result.completion.text)
+		if result.completion.prompt_tokens is not None:
+			prompt_tokens = result.completion.prompt_tokens
+		if self._governor is not None:
+			self._governor.record(prompt_tokens, completion_tokens, calls=result.completion.attempts,
+								  estimated_prompt_tokens=estimated_prompt)
+		if self._budget is not None:
+			self._budget.observe(model=model, num_pairs=num_pairs, completion_tokens=completion_tokens,
+								 truncated=result.completion.truncated)
+		return result
+
+	def iter_chunks(self, docs: Iterable[Tuple[str, str]], *, num_pairs_per_chunk: int = 3,
+					model: str | None = None, user_prompt: str | None = None,
+					start_chunk: int = 0) -> Iterator[Tuple[int, List[dict]]]:
+		"""Yield (chunk_index, records) per processed chunk.
+
+		Chunks are numbered across all docs in order; ``start_chunk`` skips those
+		done in a previous run. When the governor's cap is reached the iteration
+		ends and ``governor.resume_chunk`` holds the first unprocessed index.
+		"""
+		if self._governor is not None:
+			self._governor.resume_chunk = None
+		index = 0
 		for _path, text in docs:
 			for chunk in chunk_text(text):
-				# If a custom prompt is provided, use it literally with the chunk injected at the end.
-				if user_prompt:
-					pairs = self._llm.synthesize_qa_pairs(
-						f"{user_prompt}\n\nTEXT:\n{chunk}", model=model, num_pairs=num_pairs_per_chunk
-					)
-				else:
-					pairs = self._llm.synthesize_qa_pairs(chunk, model=model, num_pairs=num_pairs_per_chunk)
-				for pair in pairs:
-					records.append({
-						"input": pair["input"],
-						"output": pair["output"],
-					})
-		return records
+				if index >= start_chunk:
+					try:
+						recs = self.synthesize_chunk(chunk, num_pairs=num_pairs_per_chunk, model=model,
+													 user_prompt=user_prompt)
+					except BudgetExhausted:
+						self._governor.resume_chunk = index
+						return
+					yield index, recs
+				index += 1
+
+	def _run(self, docs: Iterable[Tuple[str, str]], **kwargs) -> Iterator[dict]:
+		for _index, recs in self.iter_chunks(docs, **kwargs):
+			yield from recs
+
+	def build_qa_jsonl(self, docs: Iterable[Tuple[str, str]], *, num_pairs_per_chunk: int = 3,
+					  model: str | None = None, user_prompt: str | None = None,
+					  start_chunk: int = 0) -> List[dict]:
+		return list(self._run(docs, start_chunk=start_chunk, num_pairs_per_chunk=num_pairs_per_chunk,
+							  model=model, user_prompt=user_prompt))
+
+	def build_to_sink(self, docs: Iterable[Tuple[str, str]], sink: JsonlSink, *, num_pairs_per_chunk: int = 3,
+					  model: str | None = None, user_prompt: str | None = None, start_chunk: int = 0) -> int:
+		"""Like build_qa_jsonl, but streams records into ``sink`` as each chunk completes."""
+		for rec in self._run(docs, start_chunk=start_chunk, num_pairs_per_chunk=num_pairs_per_chunk,
+							 model=model, user_prompt=user_prompt):
+			sink.write(rec)
+		return sink.records_written
 
 	@staticmethod
-	def save_jsonl(records: List[dict], out_path: str) -> None:
-		with open(out_path, "w", encoding="utf-8") as f:
+	def save_jsonl(records: List[dict], out_path: str, *, schema: str = "raw",
+				   compression: str | None = None) -> List[str]:
+		"""Write records and return the paths actually written (compression may add an extension)."""
+		with JsonlSink(out_path, schema=schema, compression=compression) as sink:
 			for rec in records:
-				f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+				sink.write(rec)
+		return sink.paths
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.dataset.budget import DEFAULT_PAIR_TOKENS, AdaptiveBudget, estimate_prompt_tokens
+from src.dataset.builder import chunk_text
+from src.loaders.document_loader import load_documents
+
+
+@dataclass
+class RateLimits:
+	requests_per_minute: int
+	tokens_per_minute: Optional[int] = None
+	requests_per_day: Optional[int] = None
+	tokens_per_day: Optional[int] = None
+
+
+# Approximate free-tier limits; override per model via (provider, model) keys.
+DEFAULT_RATE_LIMITS: Dict[object, RateLimits] = {
+	"Groq": RateLimits(requests_per_minute=30, tokens_per_minute=8000, requests_per_day=1000, tokens_per_day=200000),
+	"Gemini": RateLimits(requests_per_minute=15, tokens_per_minute=1000000, requests_per_day=1500),
+}
+
+
+def limits_for(provider: str, model: Optional[str] = None,
+			   table: Optional[Dict[object, RateLimits]] = None) -> RateLimits:
+	table = DEFAULT_RATE_LIMITS if table is None else table
+	if (provider, model) in table:
+		return table[(provider, model)]
+	if provider in table:
+		return table[provider]
+	raise ValueError(f"No rate limits configured for provider {provider!r}")
+
+
+@dataclass
+class JobPlan:
+	provider: str
+	model: Optional[str]
+	documents: int
+	chunks: int
+	requests: int
+	prompt_tokens: int
+	completion_tokens: int      # expected output
+	reserved_tokens: int        # prompt + max_tokens, what TPM quotas count against
+	est_seconds: float
+	exceeds_daily_quota: bool
+
+	@property
+	def total_tokens(self) -> int:
+		return self.prompt_tokens + self.completion_tokens
+
+	def summary(self) -> str:
+		minutes, seconds = divmod(int(self.est_seconds), 60)
+		hours, minutes = divmod(minutes, 60)
+		lines = [
+			f"Provider/model: {self.provider} / {self.model or 'default'}",
+			f"Documents: {self.documents}, chunks: {self.chunks}",
+			f"Requests: {self.requests}",
+			f"Prompt tokens: ~{self.prompt_tokens:,}",
+			f"Completion tokens: ~{self.completion_tokens:,}",
+			f"Reserved tokens (prompt + max_tokens): ~{self.reserved_tokens:,}",
+			f"Expected duration: ~{hours}h {minutes}m {seconds}s",
+		]
+		if self.exceeds_daily_quota:
+			lines.append("Warning: exceeds the daily request/token quota; the run will need more than one day.")
+		return "\n".join(lines)
+
+
+def plan_job(docs: Iterable[Tuple[str, str]], *, provider: str, model: Optional[str] = None,
+			 num_pairs: int = 3, user_prompt: Optional[str] = None, budget: Optional[AdaptiveBudget] = None,
+			 limits: Optional[RateLimits] = None, start_chunk: int = 0) -> JobPlan:
+	"""Estimate requests, tokens and duration for a run without calling any API.
+
+	Mirrors DatasetBuilder.synthesize_chunk: one request per chunk, the same
+	prompt construction, and num_pairs/max_tokens from ``budget`` when given.
+	Expected completion per pair is the budget's current estimate, or
+	DEFAULT_PAIR_TOKENS without one.
+	"""
+	limits = limits or limits_for(provider, model)
+	pair_tokens = budget.pair_tokens(model) if budget is not None else DEFAULT_PAIR_TOKENS
+	documents = chunks = requests = prompt_tokens = completion_tokens = reserved_tokens = 0
+	for _path, text in docs:
+		documents += 1
+		for chunk in chunk_text(text):
+			chunks += 1
+			if chunks <= start_chunk:
+				continue
+			pairs, max_tokens = num_pairs, 1024
+			if budget is not None:
+				plan = budget.plan(chunk, model=model)
+				pairs, max_tokens = plan.num_pairs, plan.max_tokens
+			prompt_text = f"{user_prompt}\n\nTEXT:\n{chunk}" if user_prompt else chunk
+			prompt = estimate_prompt_tokens(prompt_text, pairs)
+			requests += 1
+			prompt_tokens += prompt
+			completion_tokens += min(pairs * pair_tokens, max_tokens)
+			reserved_tokens += prompt + max_tokens
+
+	minutes = requests / limits.requests_per_minute
+	if limits.tokens_per_minute:
+		minutes = max(minutes, reserved_tokens / limits.tokens_per_minute)
+	exceeds = (
+		(limits.requests_per_day is not None and requests > limits.requests_per_day)
+		or (limits.tokens_per_day is not None and prompt_tokens + completion_tokens > limits.tokens_per_day)
+	)
+	if exceeds:
+		days = 0
+		if limits.requests_per_day:
+			days = max(days, math.ceil(requests / limits.requests_per_day) - 1)
+		if limits.tokens_per_day:
+			days = max(days, math.ceil((prompt_tokens + completion_tokens) / limits.tokens_per_day) - 1)
+		minutes += days * 24 * 60
+	return JobPlan(
+		provider=provider,
+		model=model,
+		documents=documents,
+		chunks=chunks,
+		requests=requests,
+		prompt_tokens=prompt_tokens,
+		completion_tokens=completion_tokens,
+		reserved_tokens=reserved_tokens,
+		est_seconds=minutes * 60,
+		exceeds_daily_quota=exceeds,
+	)
+
+
+def plan_files(paths: Iterable[str], **kwargs) -> JobPlan:
+	"""plan_job over load_documents(paths)."""
+	return plan_job(load_documents(paths), **kwargs)
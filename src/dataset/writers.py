@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:  # Optional: only needed for .zst output/input
+	import zstandard
+except ImportError:  # pragma: no cover
+	zstandard = None
+
+
+def _raw(record: dict) -> dict:
+	return {"input": record["input"], "output": record["output"]}
+
+
+def _messages(record: dict) -> dict:
+	# OpenAI / chat fine-tuning format
+	return {
+		"messages": [
+			{"role": "user", "content": record["input"]},
+			{"role": "assistant", "content": record["output"]},
+		]
+	}
+
+
+def _alpaca(record: dict) -> dict:
+	return {"instruction": record["input"], "input": "", "output": record["output"]}
+
+
+def _sharegpt(record: dict) -> dict:
+	return {
+		"conversations": [
+			{"from": "human", "value": record["input"]},
+			{"from": "gpt", "value": record["output"]},
+		]
+	}
+
+
+SCHEMAS: Dict[str, Callable[[dict], dict]] = {
+	"raw": _raw,
+	"messages": _messages,
+	"alpaca": _alpaca,
+	"sharegpt": _sharegpt,
+}
+
+_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _check_compression(compression: Optional[str]) -> None:
+	if compression not in _EXTENSIONS:
+		raise ValueError(f"Unsupported compression: {compression!r} (use None, 'gzip' or 'zstd')")
+	if compression == "zstd" and zstandard is None:
+		raise RuntimeError("zstd compression requires the 'zstandard' package.")
+
+
+def _get_schema(schema: str) -> Callable[[dict], dict]:
+	try:
+		return SCHEMAS[schema]
+	except KeyError:
+		raise ValueError(f"Unknown schema: {schema!r} (available: {', '.join(SCHEMAS)})") from None
+
+
+def open_jsonl(path: str) -> IO[str]:
+	"""Open a JSONL file for reading text, decompressing .gz / .zst by extension."""
+	if path.endswith(".gz"):
+		return gzip.open(path, "rt", encoding="utf-8")
+	if path.endswith(".zst"):
+		_check_compression("zstd")
+		raw = open(path, "rb")
+		return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+	return open(path, "r", encoding="utf-8")
+
+
+class JsonlSink:
+	"""Streams records to (optionally compressed) JSONL, rolling over into shards.
+
+	Records are converted with one of ``SCHEMAS`` as they are written. When
+	``max_bytes`` or ``max_records`` is set, output goes to numbered shards
+	(``name-00000.jsonl.gz``, ``name-00001.jsonl.gz``, ...). ``max_bytes``
+	counts uncompressed JSONL bytes, so compressed shards come out smaller than
+	it. Written paths are kept in ``paths``; at least one file is always created.
+	A ``.gz`` / ``.zst`` suffix on ``out_path`` implies that compression when
+	``compression`` is None, and must agree with it otherwise.
+	"""
+
+	def __init__(self, out_path: str, *, schema: str = "raw", compression: Optional[str] = None,
+				 max_bytes: Optional[int] = None, max_records: Optional[int] = None) -> None:
+		inferred = next((c for c, e in _EXTENSIONS.items() if e and out_path.endswith(e)), None)
+		if compression is None:
+			compression = inferred
+		elif inferred is not None and inferred != compression:
+			raise ValueError(f"Output path {out_path!r} does not match compression {compression!r}")
+		_check_compression(compression)
+		self._format = _get_schema(schema)
+		self._compression = compression
+		self._max_bytes = max_bytes
+		self._max_records = max_records
+		ext = _EXTENSIONS[compression]
+		if ext and out_path.endswith(ext):
+			out_path = out_path[:-len(ext)]
+		self._base, self._suffix = os.path.splitext(out_path)
+		self._suffix = (self._suffix or ".jsonl") + ext
+		self._raw: Optional[IO[bytes]] = None
+		self._stream: Optional[IO[bytes]] = None
+		self._shard_records = 0
+		self._shard_bytes = 0
+		self.paths: List[str] = []
+		self.records_written = 0
+
+	def _shard_path(self) -> str:
+		if self._max_bytes is None and self._max_records is None:
+			return self._base + self._suffix
+		return f"{self._base}-{len(self.paths):05d}{self._suffix}"
+
+	def _open_shard(self) -> None:
+		path = self._shard_path()
+		self._raw = open(path, "wb")
+		if self._compression == "gzip":
+			self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb")
+		elif self._compression == "zstd":
+			self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+		else:
+			self._stream = self._raw
+		self._shard_records = 0
+		self._shard_bytes = 0
+		self.paths.append(path)
+
+	def _close_shard(self) -> None:
+		if self._stream is not None and self._stream is not self._raw:
+			self._stream.close()
+		if self._raw is not None:
+			self._raw.close()
+		self._raw = self._stream = None
+
+	def _shard_full(self) -> bool:
+		if self._max_records is not None and self._shard_records >= self._max_records:
+			return True
+		return self._max_bytes is not None and self._shard_bytes >= self._max_bytes
+
+	def write(self, record: dict) -> None:
+		self.write_line(json.dumps(self._format(record), ensure_ascii=False))
+
+	def write_line(self, line: str) -> None:
+		"""Write an already formatted JSON line (no trailing newline)."""
+		if self._stream is not None and self._shard_full():
+			self._close_shard()
+		if self._stream is None:
+			self._open_shard()
+		data = (line + "\n").encode("utf-8")
+		self._stream.write(data)
+		self._shard_bytes += len(data)
+		self._shard_records += 1
+		self.records_written += 1
+
+	def close(self) -> None:
+		if not self.paths:
+			# Nothing written: still leave an (empty) file behind
+			self._open_shard()
+		self._close_shard()
+
+	def __enter__(self) -> "JsonlSink":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+def _convert_batch(lines: List[str], schema: str) -> Tuple[List[str], int]:
+	fmt = _get_schema(schema)
+	out: List[str] = []
+	skipped = 0
+	for line in lines:
+		line = line.strip()
+		if not line:
+			continue
+		try:
+			out.append(json.dumps(fmt(json.loads(line)), ensure_ascii=False))
+		except Exception:
+			skipped += 1
+	return out, skipped
+
+
+def _batches(f: IO[str], batch_size: int) -> Iterator[List[str]]:
+	batch: List[str] = []
+	for line in f:
+		batch.append(line)
+		if len(batch) >= batch_size:
+			yield batch
+			batch = []
+	if batch:
+		yield batch
+
+
+def convert_jsonl(in_path: str, out_path: str, *, schema: str = "messages", compression: Optional[str] = None,
+				  max_bytes: Optional[int] = None, max_records: Optional[int] = None,
+				  workers: Optional[int] = None, batch_size: int = 2000) -> Tuple[int, int]:
+	"""Convert an existing {"input","output"} JSONL dataset to another schema.
+
+	Lines are parsed and formatted in worker processes, batch by batch, with at
+	most ``2 * workers`` batches in flight, so memory stays bounded regardless
+	of file size. Output order matches input order. Returns
+	``(records_written, lines_skipped)``.
+	"""
+	_get_schema(schema)
+	workers = workers or os.cpu_count() or 1
+	skipped = 0
+	with open_jsonl(in_path) as f, JsonlSink(out_path, schema="raw", compression=compression,
+											 max_bytes=max_bytes, max_records=max_records) as sink, \
+			ProcessPoolExecutor(max_workers=workers) as pool:
+		pending: List[Future] = []
+
+		def drain_one() -> None:
+			nonlocal skipped
+			lines, bad = pending.pop(0).result()
+			skipped += bad
+			for line in lines:
+				sink.write_line(line)
+
+		for batch in _batches(f, batch_size):
+			pending.append(pool.submit(_convert_batch, batch, schema))
+			if len(pending) >= 2 * workers:
+				drain_one()
+		while pending:
+			drain_one()
+		return sink.records_written, skipped
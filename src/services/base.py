@@ -1,14 +1,44 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Protocol, List, Dict, Optional
 
 
+@dataclass
+class Completion:
+	"""Text of one generate call plus the provider's reported usage.
+
+	Token counts are None when the provider omitted usage. ``attempts`` counts
+	HTTP requests made, including retried ones.
+	"""
+	text: str
+	prompt_tokens: Optional[int] = None
+	completion_tokens: Optional[int] = None
+	truncated: bool = False
+	attempts: int = 1
+
+
+@dataclass
+class QAResult:
+	pairs: List[Dict[str, str]] = field(default_factory=list)
+	completion: Completion = field(default_factory=lambda: Completion(text=""))
+
+
 class LLMService(Protocol):
 	def generate(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
 				temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
 				timeout: int = 60) -> str:  # pragma: no cover
 		...
 
+	def generate_completion(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
+							temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
+							timeout: int = 60) -> Completion:  # pragma: no cover
+		...
+
 	def synthesize_qa_pairs(self, text_chunk: str, *, model: Optional[str] = None,
-							num_pairs: int = 3) -> List[Dict[str, str]]:  # pragma: no cover
+							num_pairs: int = 3, max_tokens: int = 1024) -> List[Dict[str, str]]:  # pragma: no cover
+		...
+
+	def synthesize_qa(self, text_chunk: str, *, model: Optional[str] = None,
+					  num_pairs: int = 3, max_tokens: int = 1024, retries: int = 3) -> QAResult:  # pragma: no cover
 		...
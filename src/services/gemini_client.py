@@ -7,6 +7,8 @@ from typing import List, Dict, Optional
 import requests
 
 from src.config import AppConfig
+from src.services.base import Completion, QAResult
+from src.services.prompts import QA_SYSTEM_PROMPT, build_qa_user_prompt, pairs_from_completion
 
 
 class GeminiService:
@@ -23,6 +25,14 @@ class GeminiService:
 	def generate(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
 				temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
 				timeout: int = 60) -> str:
+		return self.generate_completion(
+			system_prompt=system_prompt, user_prompt=user_prompt, model=model, temperature=temperature,
+			max_tokens=max_tokens, retries=retries, timeout=timeout,
+		).text
+
+	def generate_completion(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
+							temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
+							timeout: int = 60) -> Completion:
 		model_name = model or "gemini-1.5-pro"
 		url = self._BASE_URL.format(model=model_name)
 		params = {"key": self._config.gemini_api_key}
@@ -48,13 +58,25 @@ class GeminiService:
 									 headers={"Content-Type": "application/json"})
 				if resp.status_code == 200:
 					data = resp.json()
+					usage = data.get("usageMetadata") or {}
+					completion = Completion(
+						text="",
+						prompt_tokens=usage.get("promptTokenCount"),
+						# Thinking models bill thoughtsTokenCount on top of candidatesTokenCount
+						completion_tokens=(
+							usage.get("candidatesTokenCount", 0) + usage.get("thoughtsTokenCount", 0)
+							if "candidatesTokenCount" in usage else None
+						),
+						attempts=attempt + 1,
+					)
 					cands = data.get("candidates", [])
 					if not cands:
-						return ""
+						return completion
+					completion.truncated = cands[0].get("finishReason") == "MAX_TOKENS"
 					parts = cands[0].get("content", {}).get("parts", [])
-					if not parts:
-						return ""
-					return str(parts[0].get("text", "")).strip()
+					if parts:
+						completion.text = str(parts[0].get("text", "")).strip()
+					return completion
 				if resp.status_code in (429, 500, 502, 503, 504):
 					last_error = RuntimeError(f"Gemini API error {resp.status_code}: {resp.text[:200]}")
 					time.sleep(min(2 ** attempt, 10))
@@ -66,34 +88,13 @@ class GeminiService:
 		raise RuntimeError(f"Gemini generate failed after retries: {last_error}")
 
 	def synthesize_qa_pairs(self, text_chunk: str, *, model: Optional[str] = None,
-							num_pairs: int = 3) -> List[Dict[str, str]]:
-		system_prompt = (
-			"You create high-quality question-answer pairs for supervised fine-tuning. "
-			"Keep questions grounded only in the provided text, avoid outside knowledge. "
-			"Answers must be concise but complete."
-		)
-		user_prompt = (
-			f"From the following text, write {num_pairs} diverse question-answer pairs.\n\n"
-			f"Text:\n{text_chunk}\n\n"
-			"Return JSON array with objects having 'input' and 'output' keys only."
-		)
-		result = self.generate(system_prompt=system_prompt, user_prompt=user_prompt, model=model)
-		try:
-			parsed = json.loads(self._extract_json(result))
-			cleaned: List[Dict[str, str]] = []
-			for item in parsed:
-				inp = str(item.get("input", "")).strip()
-				out = str(item.get("output", "")).strip()
-				if inp and out:
-					cleaned.append({"input": inp, "output": out})
-			return cleaned
-		except Exception:
-			return [{"input": "Summarize the text:", "output": result}]
+							num_pairs: int = 3, max_tokens: int = 1024) -> List[Dict[str, str]]:
+		return self.synthesize_qa(text_chunk, model=model, num_pairs=num_pairs, max_tokens=max_tokens).pairs
 
-	@staticmethod
-	def _extract_json(text: str) -> str:
-		start = text.find("[")
-		end = text.rfind("]")
-		if start != -1 and end != -1 and end > start:
-			return text[start:end + 1]
-		return text
+	def synthesize_qa(self, text_chunk: str, *, model: Optional[str] = None,
+					  num_pairs: int = 3, max_tokens: int = 1024, retries: int = 3) -> QAResult:
+		completion = self.generate_completion(
+			system_prompt=QA_SYSTEM_PROMPT, user_prompt=build_qa_user_prompt(text_chunk, num_pairs),
+			model=model, max_tokens=max_tokens, retries=retries,
+		)
+		return QAResult(pairs=pairs_from_completion(completion), completion=completion)
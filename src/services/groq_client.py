@@ -7,6 +7,8 @@ from typing import List, Dict, Optional
 import requests
 
 from src.config import AppConfig
+from src.services.base import Completion, QAResult
+from src.services.prompts import QA_SYSTEM_PROMPT, build_qa_user_prompt, pairs_from_completion
 
 
 class GroqService:
@@ -23,6 +25,14 @@ class GroqService:
 	def generate(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
 				temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
 				timeout: int = 60) -> str:
+		return self.generate_completion(
+			system_prompt=system_prompt, user_prompt=user_prompt, model=model, temperature=temperature,
+			max_tokens=max_tokens, retries=retries, timeout=timeout,
+		).text
+
+	def generate_completion(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
+							temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
+							timeout: int = 60) -> Completion:
 		payload = {
 			"model": model or self._config.default_model,
 			"messages": [
@@ -43,7 +53,15 @@ class GroqService:
 				resp = requests.post(self._BASE_URL, headers=headers, data=json.dumps(payload), timeout=timeout)
 				if resp.status_code == 200:
 					data = resp.json()
-					return data["choices"][0]["message"]["content"].strip()
+					choice = data["choices"][0]
+					usage = data.get("usage") or {}
+					return Completion(
+						text=choice["message"]["content"].strip(),
+						prompt_tokens=usage.get("prompt_tokens"),
+						completion_tokens=usage.get("completion_tokens"),
+						truncated=choice.get("finish_reason") == "length",
+						attempts=attempt + 1,
+					)
 				# Retry for 429/5xx
 				if resp.status_code in (429, 500, 502, 503, 504):
 					last_error = RuntimeError(f"Groq API error {resp.status_code}: {resp.text[:200]}")
@@ -57,35 +75,13 @@ class GroqService:
 		raise RuntimeError(f"Groq generate failed after retries: {last_error}")
 
 	def synthesize_qa_pairs(self, text_chunk: str, *, model: Optional[str] = None,
-							num_pairs: int = 3) -> List[Dict[str, str]]:
-		system_prompt = (
-			"You create high-quality question-answer pairs for supervised fine-tuning. "
-			"Keep questions grounded only in the provided text, avoid outside knowledge. "
-			"Answers must be concise but complete."
-		)
-		user_prompt = (
-			f"From the following text, write {num_pairs} diverse question-answer pairs.\n\n"
-			f"Text:\n{text_chunk}\n\n"
-			"Return JSON array with objects having 'input' and 'output' keys only."
-		)
-		result = self.generate(system_prompt=system_prompt, user_prompt=user_prompt, model=model)
-		try:
-			parsed = json.loads(self._extract_json(result))
-			cleaned: List[Dict[str, str]] = []
-			for item in parsed:
-				inp = str(item.get("input", "")).strip()
-				out = str(item.get("output", "")).strip()
-				if inp and out:
-					cleaned.append({"input": inp, "output": out})
-			return cleaned
-		except Exception:
-			# Fallback: wrap as a single pair if JSON parsing fails
-			return [{"input": "Summarize the text:", "output": result}]
+							num_pairs: int = 3, max_tokens: int = 1024) -> List[Dict[str, str]]:
+		return self.synthesize_qa(text_chunk, model=model, num_pairs=num_pairs, max_tokens=max_tokens).pairs
 
-	@staticmethod
-	def _extract_json(text: str) -> str:
-		start = text.find("[")
-		end = text.rfind("]")
-		if start != -1 and end != -1 and end > start:
-			return text[start:end + 1]
-		return text
+	def synthesize_qa(self, text_chunk: str, *, model: Optional[str] = None,
+					  num_pairs: int = 3, max_tokens: int = 1024, retries: int = 3) -> QAResult:
+		completion = self.generate_completion(
+			system_prompt=QA_SYSTEM_PROMPT, user_prompt=build_qa_user_prompt(text_chunk, num_pairs),
+			model=model, max_tokens=max_tokens, retries=retries,
+		)
+		return QAResult(pairs=pairs_from_completion(completion), completion=completion)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, List
+
+from src.services.base import Completion
+
+
+QA_SYSTEM_PROMPT = (
+	"You create high-quality question-answer pairs for supervised fine-tuning. "
+	"Keep questions grounded only in the provided text, avoid outside knowledge. "
+	"Answers must be concise but complete."
+)
+
+
+def build_qa_user_prompt(text_chunk: str, num_pairs: int) -> str:
+	return (
+		f"From the following text, write {num_pairs} diverse question-answer pairs.\n\n"
+		f"Text:\n{text_chunk}\n\n"
+		"Return JSON array with objects having 'input' and 'output' keys only."
+	)
+
+
+def _extract_json(text: str) -> str:
+	start = text.find("[")
+	end = text.rfind("]")
+	if start != -1 and end != -1 and end > start:
+		return text[start:end + 1]
+	return text
+
+
+def _clean_pairs(items) -> List[Dict[str, str]]:
+	cleaned: List[Dict[str, str]] = []
+	for item in items:
+		if not isinstance(item, dict):
+			continue
+		inp = str(item.get("input", "")).strip()
+		out = str(item.get("output", "")).strip()
+		if inp and out:
+			cleaned.append({"input": inp, "output": out})
+	return cleaned
+
+
+def parse_qa_pairs(result: str) -> List[Dict[str, str]]:
+	try:
+		return _clean_pairs(json.loads(_extract_json(result)))
+	except Exception:
+		# Fallback: wrap as a single pair if JSON parsing fails
+		return [{"input": "Summarize the text:", "output": result}]
+
+
+def salvage_qa_pairs(result: str) -> List[Dict[str, str]]:
+	"""Complete objects from a JSON array that was cut off mid-way; never falls back to raw text."""
+	start = result.find("[")
+	if start == -1:
+		return []
+	decoder = json.JSONDecoder()
+	items = []
+	pos = start + 1
+	while True:
+		while pos < len(result) and result[pos] in " \t\r\n,":
+			pos += 1
+		try:
+			item, pos = decoder.raw_decode(result, pos)
+		except ValueError:
+			break
+		items.append(item)
+	return _clean_pairs(items)
+
+
+def pairs_from_completion(completion: Completion) -> List[Dict[str, str]]:
+	# A truncated response is never wrapped as a "Summarize the text:" pair; only its complete objects are kept
+	if completion.truncated:
+		return salvage_qa_pairs(completion.text)
+	return parse_qa_pairs(completion.text)
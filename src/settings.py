@@ -8,6 +8,9 @@ from typing import Dict, Any
 _DEFAULTS = {
 	"prompt": "",
 	"output_dir": "output",
+	"auto_budget": False,
+	"output_schema": "raw",
+	"compression": "none",
 }
 
 
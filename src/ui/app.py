@@ -5,13 +5,16 @@ import threading
 import datetime as dt
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from typing import List, Tuple
+from typing import List
 
 from src.config import AppConfig
 from src.services.groq_client import GroqService
 from src.services.gemini_client import GeminiService
 from src.loaders.document_loader import load_documents
 from src.dataset.builder import DatasetBuilder, chunk_text
+from src.dataset.budget import AdaptiveBudget, BudgetGovernor
+from src.dataset.planner import plan_job
+from src.dataset.writers import SCHEMAS
 from src.settings import load_settings, save_settings
 
 
@@ -19,7 +22,7 @@ class DatasetApp(tk.Tk):
 	def __init__(self) -> None:
 		super().__init__()
 		self.title("Dataset Factory - LLM Providers")
-		self.geometry("860x740")
+		self.geometry("940x780")
 
 		self.selected_files: List[str] = []
 		self.settings = load_settings()
@@ -72,6 +75,10 @@ class DatasetApp(tk.Tk):
 		self.pairs_entry.insert(0, "3")
 		self.pairs_entry.grid(row=0, column=9, padx=5)
 
+		self.auto_budget_var = tk.BooleanVar(value=bool(self.settings.get("auto_budget", False)))
+		self.auto_budget_check = tk.Checkbutton(btn_frame, text="Auto-size", variable=self.auto_budget_var)
+		self.auto_budget_check.grid(row=0, column=10, padx=5)
+
 		prompt_frame = tk.LabelFrame(self, text="Custom Prompt (optional)")
 		prompt_frame.pack(fill=tk.BOTH, padx=10, pady=10, expand=True)
 		self.prompt_text = tk.Text(prompt_frame, height=8, wrap=tk.WORD)
@@ -88,8 +95,38 @@ class DatasetApp(tk.Tk):
 		self.out_entry.grid(row=0, column=1, padx=5, sticky="we")
 		self.btn_browse_out = tk.Button(out_frame, text="Browse", command=self.choose_output_dir)
 		self.btn_browse_out.grid(row=0, column=2, padx=5)
+		self.format_label = tk.Label(out_frame, text="Format:")
+		self.format_label.grid(row=1, column=0, padx=5, pady=4, sticky="w")
+		fmt_frame = tk.Frame(out_frame)
+		fmt_frame.grid(row=1, column=1, columnspan=2, sticky="w")
+		self.schema_var = tk.StringVar(value=self.settings.get("output_schema", "raw"))
+		self.schema_menu = tk.OptionMenu(fmt_frame, self.schema_var, *SCHEMAS.keys())
+		self.schema_menu.grid(row=0, column=0, padx=5)
+		self.compression_label = tk.Label(fmt_frame, text="Compression:")
+		self.compression_label.grid(row=0, column=1, padx=5)
+		self.compression_var = tk.StringVar(value=self.settings.get("compression", "none"))
+		self.compression_menu = tk.OptionMenu(fmt_frame, self.compression_var, "none", "gzip", "zstd")
+		self.compression_menu.grid(row=0, column=2, padx=5)
 		out_frame.grid_columnconfigure(1, weight=1)
 
+		limits_frame = tk.Frame(self)
+		limits_frame.pack(fill=tk.X, padx=10, pady=5)
+		self.token_cap_label = tk.Label(limits_frame, text="Token cap:")
+		self.token_cap_label.grid(row=0, column=0, padx=5)
+		self.token_cap_entry = tk.Entry(limits_frame, width=10)
+		self.token_cap_entry.grid(row=0, column=1, padx=5)
+		self.call_cap_label = tk.Label(limits_frame, text="Call cap:")
+		self.call_cap_label.grid(row=0, column=2, padx=5)
+		self.call_cap_entry = tk.Entry(limits_frame, width=7)
+		self.call_cap_entry.grid(row=0, column=3, padx=5)
+		self.start_chunk_label = tk.Label(limits_frame, text="Start at chunk:")
+		self.start_chunk_label.grid(row=0, column=4, padx=5)
+		self.start_chunk_entry = tk.Entry(limits_frame, width=7)
+		self.start_chunk_entry.insert(0, "0")
+		self.start_chunk_entry.grid(row=0, column=5, padx=5)
+		self.btn_dry_run = tk.Button(limits_frame, text="Dry run", command=self.run_dry_run)
+		self.btn_dry_run.grid(row=0, column=6, padx=5)
+
 		progress_frame = tk.Frame(self)
 		progress_frame.pack(fill=tk.X, padx=10, pady=10)
 		self.progress = ttk.Progressbar(progress_frame, orient="horizontal", mode="determinate")
@@ -150,6 +187,9 @@ class DatasetApp(tk.Tk):
 		save_settings({
 			"prompt": prompt_value,
 			"output_dir": output_dir,
+			"auto_budget": bool(self.auto_budget_var.get()),
+			"output_schema": self.schema_var.get(),
+			"compression": self.compression_var.get(),
 		})
 
 	def add_files(self) -> None:
@@ -180,16 +220,75 @@ class DatasetApp(tk.Tk):
 		self.file_list.delete(0, tk.END)
 
 	def _set_controls_state(self, state: str) -> None:
-		for w in [self.btn_add, self.btn_clear, self.provider_menu, self.model_preset_menu, self.model_entry, self.pairs_entry, self.btn_browse_out, self.btn_run]:
+		for w in [self.btn_add, self.btn_clear, self.provider_menu, self.model_preset_menu, self.model_entry, self.pairs_entry, self.auto_budget_check, self.btn_browse_out, self.schema_menu, self.compression_menu, self.token_cap_entry, self.call_cap_entry, self.start_chunk_entry, self.btn_dry_run, self.btn_run]:
 			try:
 				w.configure(state=state)
 			except Exception:
 				pass
 
+	def _read_numbers(self) -> dict | None:
+		"""Parse the numeric fields, or show an error and return None if any is invalid."""
+		fields = [
+			("pairs", "#pairs/chunk", self.pairs_entry, 3, 1),
+			("token_cap", "Token cap", self.token_cap_entry, None, 1),
+			("call_cap", "Call cap", self.call_cap_entry, None, 1),
+			("start_chunk", "Start at chunk", self.start_chunk_entry, 0, 0),
+		]
+		values: dict = {}
+		for key, label, entry, default, minimum in fields:
+			raw = entry.get().strip()
+			if not raw:
+				values[key] = default
+				continue
+			try:
+				value = int(raw)
+			except ValueError:
+				value = None
+			if value is None or value < minimum:
+				messagebox.showerror("Invalid input", f"{label} must be a whole number >= {minimum} (got {raw!r}).")
+				return None
+			values[key] = value
+		return values
+
+	def _resolve_model(self, provider: str) -> str:
+		return self.model_entry.get().strip() or self._recommended_for(provider)
+
+	def run_dry_run(self) -> None:
+		if not self.selected_files:
+			messagebox.showwarning("No files", "Please add at least one file.")
+			return
+		numbers = self._read_numbers()
+		if numbers is None:
+			return
+		provider = self.provider_var.get()
+		budget = AdaptiveBudget(pairs_per_full_chunk=numbers["pairs"]) if self.auto_budget_var.get() else None
+		self.status_var.set("Planning...")
+		self.update_idletasks()
+		plan = plan_job(
+			load_documents(self.selected_files),
+			provider=provider,
+			model=self._resolve_model(provider),
+			num_pairs=numbers["pairs"],
+			user_prompt=self.prompt_text.get("1.0", tk.END).strip() or None,
+			budget=budget,
+			start_chunk=numbers["start_chunk"],
+		)
+		self.status_var.set("Ready")
+		messagebox.showinfo("Dry run", plan.summary())
+
 	def run_generation(self) -> None:
 		if not self.selected_files:
 			messagebox.showwarning("No files", "Please add at least one file.")
 			return
+		# Validate everything before controls are disabled, so bad input never leaves the UI locked
+		numbers = self._read_numbers()
+		if numbers is None:
+			return
+		try:
+			config = AppConfig.from_env()
+		except ValueError as exc:
+			messagebox.showerror("Configuration", str(exc))
+			return
 
 		self.persist_settings()
 		self._set_controls_state("disabled")
@@ -199,48 +298,34 @@ class DatasetApp(tk.Tk):
 
 		# Prepare data and chunk counts on UI thread first
 		docs = load_documents(self.selected_files)
-		all_chunks: List[Tuple[str, str]] = []  # list of (path, chunk)
-		for path, text in docs:
-			for ch in chunk_text(text):
-				all_chunks.append((path, ch))
-
-		total = max(len(all_chunks), 1)
+		total = max(sum(len(chunk_text(text)) for _path, text in docs), 1)
 		self.progress.configure(maximum=total, value=0)
 
 		provider = self.provider_var.get()
-		model = self.model_entry.get().strip() or None
-		num_pairs = int(self.pairs_entry.get().strip() or "3")
+		model = self._resolve_model(provider)
+		num_pairs = numbers["pairs"]
 		user_prompt = self.prompt_text.get("1.0", tk.END).strip() or None
 
-		config = AppConfig.from_env()
 		if provider == "Gemini":
 			llm = GeminiService(config)
-			if not model:
-				model = self._recommended_for("Gemini")
 		else:
 			llm = GroqService(config)
-			if not model:
-				model = self._recommended_for("Groq")
 
-		builder = DatasetBuilder(llm)
+		# Auto-size treats #pairs/chunk as the count for a full-size chunk and scales per chunk.
+		budget = AdaptiveBudget(pairs_per_full_chunk=num_pairs) if self.auto_budget_var.get() else None
+		governor = BudgetGovernor(max_tokens=numbers["token_cap"], max_calls=numbers["call_cap"])
+		builder = DatasetBuilder(llm, budget=budget, governor=governor)
 
 		results: List[dict] = []
 
 		def worker() -> None:
 			try:
-				processed = 0
-				for _path, chunk in all_chunks:
-					pairs = llm.synthesize_qa_pairs(
-						(f"{user_prompt}\n\nTEXT:\n{chunk}" if user_prompt else chunk),
-						model=model,
-						num_pairs=num_pairs,
-					)
-					for pair in pairs:
-						results.append({"input": pair["input"], "output": pair["output"]})
-					processed += 1
-					self.after(0, self._update_progress, processed, total)
-
-				self.after(0, self._on_generation_done, results)
+				for index, recs in builder.iter_chunks(docs, num_pairs_per_chunk=num_pairs, model=model,
+													   user_prompt=user_prompt, start_chunk=numbers["start_chunk"]):
+					results.extend(recs)
+					self.after(0, self._update_progress, index + 1, total)
+
+				self.after(0, self._on_generation_done, results, governor.resume_chunk)
 			except Exception as exc:
 				self.after(0, self._on_generation_error, str(exc))
 
@@ -250,26 +335,41 @@ class DatasetApp(tk.Tk):
 		self.progress.configure(value=processed)
 		self.progress_var.set(f"Processed {processed}/{total} chunks")
 
-	def _on_generation_done(self, records: List[dict]) -> None:
+	def _on_generation_done(self, records: List[dict], resume_chunk: int | None = None) -> None:
 		self.status_var.set("Completed")
+		if resume_chunk is not None:
+			messagebox.showinfo("Budget reached", f"Budget cap reached; stopped before chunk {resume_chunk}. "
+								"Save the partial dataset, then run again to resume from that chunk.")
+		saved: List[str] = []
 		# Ensure output directory
 		output_dir = self.output_dir_var.get().strip() or "output"
 		os.makedirs(output_dir, exist_ok=True)
+		compression = {"gzip": "gzip", "zstd": "zstd"}.get(self.compression_var.get())
+		ext = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}.get(compression, ".jsonl")
 		# Default file name as timestamp
 		ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-		default_path = os.path.join(output_dir, f"dataset_{ts}.jsonl")
+		default_path = os.path.join(output_dir, f"dataset_{ts}{ext}")
 		out_path = filedialog.asksaveasfilename(
 			title="Save dataset",
 			initialdir=output_dir,
 			initialfile=os.path.basename(default_path),
-			defaultextension=".jsonl",
-			filetypes=[("JSON Lines", "*.jsonl"), ("All Files", "*.*")],
+			defaultextension=ext,
+			filetypes=[("JSON Lines", f"*{ext}"), ("All Files", "*.*")],
 		)
 		if out_path:
-			DatasetBuilder.save_jsonl(records, out_path)
-			self.status_var.set(f"Saved: {out_path}")
-			messagebox.showinfo("Done", f"Saved {len(records)} records to {out_path}")
+			try:
+				saved = DatasetBuilder.save_jsonl(records, out_path, schema=self.schema_var.get(),
+												  compression=compression)
+			except Exception as exc:
+				self._on_generation_error(str(exc))
+				return
+			self.status_var.set(f"Saved: {', '.join(saved)}")
+			messagebox.showinfo("Done", f"Saved {len(records)} records to:\n" + "\n".join(saved))
 		self._set_controls_state("normal")
+		# Advance the resume point only once the partial records are safely on disk (entry must be enabled)
+		if resume_chunk is not None and saved:
+			self.start_chunk_entry.delete(0, tk.END)
+			self.start_chunk_entry.insert(0, str(resume_chunk))
 		self.progress_var.set("Idle")
 		self.progress.configure(value=0)
 
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+
+@pytest.fixture
+def make_docs():
+	def _make(*chunk_counts: int, line: str = "x" * 99) -> List[tuple]:
+		# Each 20-line block of 100-char lines fills exactly one 2000-char chunk
+		return [(f"doc{i}.txt", "\n".join([line] * (20 * n))) for i, n in enumerate(chunk_counts)]
+	return _make
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional
+
+from src.services.base import Completion, QAResult
+from src.services.prompts import pairs_from_completion
+
+
+class FakeLLM:
+	"""In-memory LLMService that answers and reports usage like a real provider.
+
+	Each pair costs ``tokens_per_pair`` completion tokens; when ``max_tokens`` is
+	too small for the requested pairs the JSON array is cut off mid-object and
+	flagged truncated, like finish_reason == "length". ``attempts`` simulates
+	HTTP retries the provider needed per call.
+	"""
+
+	def __init__(self, *, tokens_per_pair: int = 100, prompt_tokens: int = 500, report_usage: bool = True,
+				 malformed: bool = False, attempts: int = 1) -> None:
+		self.tokens_per_pair = tokens_per_pair
+		self.prompt_tokens = prompt_tokens
+		self.report_usage = report_usage
+		self.malformed = malformed
+		self.attempts = attempts
+		self.calls: List[Dict] = []
+
+	def _complete(self, num_pairs: int, max_tokens: int, retries: int) -> Completion:
+		needed = self.tokens_per_pair * num_pairs
+		truncated = needed > max_tokens
+		fit = min(num_pairs, max_tokens // self.tokens_per_pair)
+		pairs = [{"input": f"q{len(self.calls)}-{i}", "output": "answer"} for i in range(fit)]
+		if self.malformed:
+			text = "Sure! Here are some questions about the text."
+		elif truncated:
+			text = json.dumps(pairs)[:-1] + (', {"input": "cut o' if pairs else '{"input": "cut o')
+		else:
+			text = json.dumps(pairs)
+		return Completion(
+			text=text,
+			prompt_tokens=self.prompt_tokens if self.report_usage else None,
+			completion_tokens=min(needed, max_tokens) if self.report_usage else None,
+			truncated=truncated,
+			attempts=min(self.attempts, retries + 1),
+		)
+
+	def generate(self, **kwargs) -> str:
+		return self.generate_completion(**kwargs).text
+
+	def generate_completion(self, *, system_prompt: str, user_prompt: str, model: Optional[str] = None,
+							temperature: float = 0.2, max_tokens: int = 1024, retries: int = 3,
+							timeout: int = 60) -> Completion:
+		self.calls.append({"text": user_prompt, "model": model, "num_pairs": 1, "max_tokens": max_tokens})
+		return self._complete(1, max_tokens, retries)
+
+	def synthesize_qa_pairs(self, text_chunk: str, *, model: Optional[str] = None, num_pairs: int = 3,
+							max_tokens: int = 1024) -> List[Dict[str, str]]:
+		return self.synthesize_qa(text_chunk, model=model, num_pairs=num_pairs, max_tokens=max_tokens).pairs
+
+	def synthesize_qa(self, text_chunk: str, *, model: Optional[str] = None, num_pairs: int = 3,
+					  max_tokens: int = 1024, retries: int = 3) -> QAResult:
+		self.calls.append({"text": text_chunk, "model": model, "num_pairs": num_pairs, "max_tokens": max_tokens,
+						   "retries": retries})
+		completion = self._complete(num_pairs, max_tokens, retries)
+		return QAResult(pairs=pairs_from_completion(completion), completion=completion)
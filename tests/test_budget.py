@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from src.dataset.budget import DEFAULT_PAIR_TOKENS, AdaptiveBudget, _CompletionHistogram
+from src.dataset.builder import DatasetBuilder
+
+from tests.fakes import FakeLLM
+
+
+FULL_CHUNK = "x" * 2000
+
+
+def test_histogram_percentile_returns_upper_bucket_edge():
+	hist = _CompletionHistogram(bucket_width=10, num_buckets=10)
+	for tokens in (5, 15, 15, 25, 95):
+		hist.add(tokens)
+	assert hist.percentile(0.2) == 10
+	assert hist.percentile(0.6) == 20
+	assert hist.percentile(0.8) == 30
+	assert hist.percentile(1.0) == 100
+
+
+def test_histogram_clamps_outliers_into_last_bucket():
+	hist = _CompletionHistogram(bucket_width=10, num_buckets=3)
+	hist.add(10_000)
+	assert hist.percentile(1.0) == 30
+
+
+def test_num_pairs_scales_with_chunk_length_and_is_clamped():
+	budget = AdaptiveBudget(pairs_per_full_chunk=4, max_pairs=6)
+	assert budget.plan(FULL_CHUNK).num_pairs == 4
+	assert budget.plan("x" * 1000).num_pairs == 2
+	assert budget.plan("x" * 10).num_pairs == 1
+	assert budget.plan("x" * 8000).num_pairs == 6
+
+
+def test_max_tokens_uses_default_until_enough_samples():
+	budget = AdaptiveBudget(pairs_per_full_chunk=3, min_tokens=1)
+	assert budget.pair_tokens("m") == DEFAULT_PAIR_TOKENS
+	for _ in range(AdaptiveBudget._MIN_SAMPLES - 1):
+		budget.observe(model="m", num_pairs=3, completion_tokens=300)
+	assert budget.pair_tokens("m") == DEFAULT_PAIR_TOKENS
+	budget.observe(model="m", num_pairs=3, completion_tokens=300)
+	# 100 tokens/pair lands in the 96-112 bucket
+	assert budget.pair_tokens("m") == 112
+	assert budget.plan(FULL_CHUNK, model="m").max_tokens == round(112 * 3 * 1.15 + 0.5)
+	# Histograms are per model
+	assert budget.pair_tokens("other") == DEFAULT_PAIR_TOKENS
+
+
+def test_truncation_widens_headroom_without_sampling_then_decays():
+	budget = AdaptiveBudget(pairs_per_full_chunk=3, min_tokens=1)
+	base = budget.plan(FULL_CHUNK, model="m").max_tokens
+	budget.observe(model="m", num_pairs=3, completion_tokens=10, truncated=True)
+	widened = budget.plan(FULL_CHUNK, model="m").max_tokens
+	assert widened > base
+	assert budget.pair_tokens("m") == DEFAULT_PAIR_TOKENS
+	for _ in range(50):
+		budget.observe(model="m", num_pairs=3, completion_tokens=3 * DEFAULT_PAIR_TOKENS)
+	assert budget.plan(FULL_CHUNK, model="m").max_tokens < widened
+
+
+def test_headroom_is_capped():
+	budget = AdaptiveBudget(min_tokens=1, max_tokens=100_000)
+	for _ in range(20):
+		budget.observe(model="m", num_pairs=3, completion_tokens=0, truncated=True)
+	plan = budget.plan(FULL_CHUNK, model="m")
+	assert plan.max_tokens == round(DEFAULT_PAIR_TOKENS * 3 * AdaptiveBudget._MAX_HEADROOM)
+
+
+def test_pairs_reduced_when_ceiling_cannot_fit_them():
+	budget = AdaptiveBudget(pairs_per_full_chunk=10, max_tokens=500)
+	plan = budget.plan(FULL_CHUNK)
+	assert plan.max_tokens == 500
+	assert plan.num_pairs == 500 // DEFAULT_PAIR_TOKENS
+
+
+def test_builder_feeds_reported_usage_and_finish_reason():
+	llm = FakeLLM(tokens_per_pair=100)
+	budget = AdaptiveBudget(pairs_per_full_chunk=3, min_tokens=1)
+	builder = DatasetBuilder(llm, budget=budget)
+	for _ in range(AdaptiveBudget._MIN_SAMPLES):
+		builder.synthesize_chunk(FULL_CHUNK, model="m")
+	assert budget.pair_tokens("m") == 112
+	builder.synthesize_chunk(FULL_CHUNK, model="m")
+	assert llm.calls[-1]["max_tokens"] == budget.plan(FULL_CHUNK, model="m").max_tokens < llm.calls[0]["max_tokens"]
+
+
+def test_malformed_answer_is_not_treated_as_truncation():
+	budget = AdaptiveBudget(min_tokens=1)
+	before = budget.plan(FULL_CHUNK, model="m").max_tokens
+	builder = DatasetBuilder(FakeLLM(malformed=True, tokens_per_pair=DEFAULT_PAIR_TOKENS), budget=budget)
+	builder.synthesize_chunk(FULL_CHUNK, model="m")
+	assert budget.plan(FULL_CHUNK, model="m").max_tokens == before
+
+
+def test_reported_truncation_widens_headroom():
+	budget = AdaptiveBudget(min_tokens=1)
+	before = budget.plan(FULL_CHUNK, model="m").max_tokens
+	builder = DatasetBuilder(FakeLLM(tokens_per_pair=1000), budget=budget)
+	builder.synthesize_chunk(FULL_CHUNK, model="m")
+	assert budget.plan(FULL_CHUNK, model="m").max_tokens > before
+
+
+def test_truncated_response_keeps_only_complete_pairs():
+	# 3 pairs of 250 tokens against 587 max_tokens: two complete objects, then a cut-off one
+	builder = DatasetBuilder(FakeLLM(tokens_per_pair=250), budget=AdaptiveBudget(min_tokens=1))
+	records = builder.synthesize_chunk(FULL_CHUNK, model="m")
+	assert [rec["input"] for rec in records] == ["q1-0", "q1-1"]
+
+
+def test_truncated_response_never_emits_fallback_pair():
+	records = DatasetBuilder(FakeLLM(tokens_per_pair=2000)).synthesize_chunk(FULL_CHUNK)
+	assert records == []
+
+
+def test_unsalvageable_truncation_retries_once_with_widened_plan():
+	llm = FakeLLM(tokens_per_pair=280)
+	builder = DatasetBuilder(llm, budget=AdaptiveBudget())
+	records = builder.synthesize_chunk("x" * 200, model="m")
+	assert [call["max_tokens"] for call in llm.calls] == [256, 294]
+	assert [rec["input"] for rec in records] == ["q2-0"]
+
+
+def test_retry_happens_at_most_once():
+	llm = FakeLLM(tokens_per_pair=5000)
+	assert DatasetBuilder(llm, budget=AdaptiveBudget()).synthesize_chunk(FULL_CHUNK) == []
+	assert len(llm.calls) == 2
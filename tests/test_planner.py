@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import pytest
+
+from src.dataset.budget import DEFAULT_PAIR_TOKENS, AdaptiveBudget, BudgetGovernor, estimate_prompt_tokens
+from src.dataset.builder import DatasetBuilder
+from src.dataset.planner import RateLimits, limits_for, plan_job
+
+from tests.fakes import FakeLLM
+
+
+def test_plan_counts_and_matches_builder_prompts(make_docs):
+	docs = make_docs(2, 3)
+	llm = FakeLLM()
+	DatasetBuilder(llm).build_qa_jsonl(docs, num_pairs_per_chunk=2, user_prompt="Be brief.")
+	plan = plan_job(docs, provider="Groq", num_pairs=2, user_prompt="Be brief.",
+					limits=RateLimits(requests_per_minute=60))
+	assert (plan.documents, plan.chunks, plan.requests) == (2, 5, 5)
+	assert plan.prompt_tokens == sum(estimate_prompt_tokens(c["text"], 2) for c in llm.calls)
+	assert plan.completion_tokens == 5 * 2 * DEFAULT_PAIR_TOKENS
+	assert plan.reserved_tokens == plan.prompt_tokens + 5 * 1024
+	assert plan.total_tokens == plan.prompt_tokens + plan.completion_tokens
+
+
+def test_plan_skips_chunks_before_start(make_docs):
+	plan = plan_job(make_docs(4), provider="Groq", start_chunk=3, limits=RateLimits(requests_per_minute=60))
+	assert (plan.chunks, plan.requests) == (4, 1)
+
+
+def test_plan_uses_budget_sizing(make_docs):
+	budget = AdaptiveBudget(pairs_per_full_chunk=2, min_tokens=1)
+	for _ in range(AdaptiveBudget._MIN_SAMPLES):
+		budget.observe(model="m", num_pairs=1, completion_tokens=100)
+	plan = plan_job(make_docs(3), provider="Groq", model="m", budget=budget,
+					limits=RateLimits(requests_per_minute=60))
+	assert plan.completion_tokens == 3 * 2 * budget.pair_tokens("m")
+	assert plan.reserved_tokens - plan.prompt_tokens == 3 * budget.plan("x" * 1999, model="m").max_tokens
+
+
+def test_duration_is_bound_by_requests_or_tokens(make_docs):
+	docs = make_docs(20)
+	by_requests = plan_job(docs, provider="Groq", limits=RateLimits(requests_per_minute=10))
+	assert by_requests.est_seconds == pytest.approx(120)
+	by_tokens = plan_job(docs, provider="Groq", limits=RateLimits(requests_per_minute=10, tokens_per_minute=1000))
+	assert by_tokens.est_seconds == pytest.approx(by_tokens.reserved_tokens / 1000 * 60)
+	assert not by_tokens.exceeds_daily_quota
+
+
+def test_daily_quota_adds_waiting_days(make_docs):
+	plan = plan_job(make_docs(12), provider="Groq", limits=RateLimits(requests_per_minute=60, requests_per_day=5))
+	assert plan.exceeds_daily_quota
+	assert plan.est_seconds == pytest.approx(12 + 2 * 24 * 3600)
+	assert "daily" in plan.summary()
+
+
+def test_limits_lookup():
+	table = {"Groq": RateLimits(30), ("Groq", "big"): RateLimits(5)}
+	assert limits_for("Groq", "big", table).requests_per_minute == 5
+	assert limits_for("Groq", "small", table).requests_per_minute == 30
+	with pytest.raises(ValueError):
+		limits_for("Other", table=table)
+
+
+def test_call_cap_stops_at_resumable_boundary(make_docs):
+	docs = make_docs(5)
+	full = DatasetBuilder(FakeLLM()).build_qa_jsonl(docs, num_pairs_per_chunk=1)
+	governor = BudgetGovernor(max_calls=2)
+	first = DatasetBuilder(FakeLLM(), governor=governor).build_qa_jsonl(docs, num_pairs_per_chunk=1)
+	assert governor.exhausted and governor.resume_chunk == 2
+	assert len(first) == 2
+	rest_llm = FakeLLM()
+	rest = DatasetBuilder(rest_llm).build_qa_jsonl(docs, num_pairs_per_chunk=1, start_chunk=governor.resume_chunk)
+	assert len(rest_llm.calls) == 3
+	assert len(first) + len(rest) == len(full)
+
+
+def test_retries_stay_within_call_cap(make_docs):
+	for max_calls in (1, 4, 5):
+		llm = FakeLLM(attempts=3)
+		governor = BudgetGovernor(max_calls=max_calls)
+		DatasetBuilder(llm, governor=governor).build_qa_jsonl(make_docs(5))
+		assert governor.calls_made <= max_calls
+		assert governor.resume_chunk == len(llm.calls)
+	# The last allowed call gets no retries
+	assert [call["retries"] for call in llm.calls] == [3, 1]
+
+
+def test_dense_prompts_scale_later_reservations(make_docs):
+	# The provider reports ~3x the len/4 prompt estimate; 2300 tokens are booked per call
+	llm = FakeLLM(prompt_tokens=2000, tokens_per_pair=100)
+	governor = BudgetGovernor(max_tokens=2 * 2300 + 2000)
+	DatasetBuilder(llm, governor=governor).build_qa_jsonl(make_docs(10), num_pairs_per_chunk=3)
+	assert governor.tokens_used == 2 * 2300
+	assert governor.tokens_used <= governor.max_tokens
+	# Unscaled, the third call would have passed reserve (4600 + ~630 + 1024 <= 6600) and ended at 6900
+	assert len(llm.calls) == 2
+
+
+def test_reused_governor_clears_resume_point(make_docs):
+	governor = BudgetGovernor(max_calls=2)
+	DatasetBuilder(FakeLLM(), governor=governor).build_qa_jsonl(make_docs(3))
+	assert governor.exhausted
+	governor.max_calls = None
+	DatasetBuilder(FakeLLM(), governor=governor).build_qa_jsonl(make_docs(3), start_chunk=governor.resume_chunk)
+	assert not governor.exhausted and governor.resume_chunk is None
+
+
+def test_token_cap_books_reported_usage_and_is_never_exceeded(make_docs):
+	llm = FakeLLM(prompt_tokens=2000, tokens_per_pair=100)
+	governor = BudgetGovernor(max_tokens=10_000)
+	DatasetBuilder(llm, governor=governor).build_qa_jsonl(make_docs(10), num_pairs_per_chunk=3)
+	# Reported 2000 prompt + 300 completion per call, far above the len/4 prompt estimate
+	assert governor.tokens_used == len(llm.calls) * 2300
+	assert governor.tokens_used <= 10_000
+	assert governor.resume_chunk == len(llm.calls)
+
+
+def test_estimates_stand_in_when_usage_is_missing(make_docs):
+	governor = BudgetGovernor()
+	llm = FakeLLM(report_usage=False)
+	DatasetBuilder(llm, governor=governor).build_qa_jsonl(make_docs(1), num_pairs_per_chunk=2)
+	assert governor.tokens_used > estimate_prompt_tokens(llm.calls[0]["text"], 2)
+
+
+def test_iter_chunks_yields_indices_from_start(make_docs):
+	builder = DatasetBuilder(FakeLLM())
+	got = [(index, len(recs)) for index, recs in builder.iter_chunks(make_docs(2, 2), num_pairs_per_chunk=2,
+																	 start_chunk=1)]
+	assert got == [(1, 2), (2, 2), (3, 2)]
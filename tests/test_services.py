@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.config import AppConfig
+from src.services import gemini_client, groq_client
+from src.services.gemini_client import GeminiService
+from src.services.groq_client import GroqService
+from src.services.base import Completion
+from src.services.prompts import pairs_from_completion, parse_qa_pairs, salvage_qa_pairs
+
+
+class _Resp:
+	def __init__(self, data: dict, status_code: int = 200) -> None:
+		self._data = data
+		self.status_code = status_code
+		self.text = json.dumps(data)
+
+	def json(self) -> dict:
+		return self._data
+
+	def raise_for_status(self) -> None:
+		raise RuntimeError(self.status_code)
+
+
+@pytest.fixture
+def config() -> AppConfig:
+	return AppConfig(groq_api_key="g", gemini_api_key="k")
+
+
+def _replay(monkeypatch, module, responses):
+	responses = list(responses)
+	monkeypatch.setattr(module.requests, "post", lambda *a, **kw: responses.pop(0))
+	monkeypatch.setattr(module.time, "sleep", lambda _s: None)
+
+
+PAIRS = '[{"input": "q", "output": "a"}]'
+
+
+def test_groq_reports_usage_truncation_and_attempts(monkeypatch, config):
+	_replay(monkeypatch, groq_client, [
+		_Resp({}, status_code=429),
+		_Resp({
+			"choices": [{"message": {"content": PAIRS}, "finish_reason": "length"}],
+			"usage": {"prompt_tokens": 321, "completion_tokens": 64},
+		}),
+	])
+	result = GroqService(config).synthesize_qa("text", max_tokens=64)
+	assert result.pairs == [{"input": "q", "output": "a"}]
+	assert (result.completion.prompt_tokens, result.completion.completion_tokens) == (321, 64)
+	assert result.completion.truncated
+	assert result.completion.attempts == 2
+
+
+def test_groq_without_usage(monkeypatch, config):
+	_replay(monkeypatch, groq_client, [
+		_Resp({"choices": [{"message": {"content": PAIRS}, "finish_reason": "stop"}]}),
+	])
+	completion = GroqService(config).generate_completion(system_prompt="s", user_prompt="u")
+	assert completion.completion_tokens is None
+	assert not completion.truncated
+
+
+def test_gemini_reports_usage_including_thoughts(monkeypatch, config):
+	_replay(monkeypatch, gemini_client, [
+		_Resp({
+			"candidates": [{"content": {"parts": [{"text": PAIRS}]}, "finishReason": "MAX_TOKENS"}],
+			"usageMetadata": {"promptTokenCount": 200, "candidatesTokenCount": 50, "thoughtsTokenCount": 30},
+		}),
+	])
+	result = GeminiService(config).synthesize_qa("text")
+	assert result.pairs == [{"input": "q", "output": "a"}]
+	assert (result.completion.prompt_tokens, result.completion.completion_tokens) == (200, 80)
+	assert result.completion.truncated
+
+
+def test_parse_qa_pairs_fallback_on_malformed_json():
+	assert parse_qa_pairs("sure! [not json]") == [{"input": "Summarize the text:", "output": "sure! [not json]"}]
+	assert parse_qa_pairs('[{"input": " q ", "output": ""}, {"input": "a", "output": "b"}]') == [
+		{"input": "a", "output": "b"}
+	]
+
+
+def test_salvage_keeps_complete_objects_of_cut_off_array():
+	cut = 'Here you go: [{"input": "q1", "output": "a1"}, {"input": "q2", "output": "a2"}, {"input": "q3", "outp'
+	assert salvage_qa_pairs(cut) == [{"input": "q1", "output": "a1"}, {"input": "q2", "output": "a2"}]
+	assert salvage_qa_pairs('[{"inp') == []
+	assert salvage_qa_pairs("no array at all") == []
+
+
+def test_truncated_completion_never_falls_back_to_raw_text():
+	assert pairs_from_completion(Completion(text='[{"input": "q", "outp', truncated=True)) == []
+	assert pairs_from_completion(Completion(text="not json")) == [{"input": "Summarize the text:", "output": "not json"}]
+
+
+def test_groq_truncated_response_is_salvaged(monkeypatch, config):
+	_replay(monkeypatch, groq_client, [
+		_Resp({"choices": [{"message": {"content": PAIRS[:-1] + ', {"input": "cut'}, "finish_reason": "length"}]}),
+	])
+	assert GroqService(config).synthesize_qa("text").pairs == [{"input": "q", "output": "a"}]
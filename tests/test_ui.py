@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import pytest
+
+from src.ui import app as ui_app
+from src.ui.app import DatasetApp
+
+
+class _Entry:
+	def __init__(self, value: str) -> None:
+		self._value = value
+
+	def get(self) -> str:
+		return self._value
+
+
+class _Form:
+	_read_numbers = DatasetApp._read_numbers
+
+	def __init__(self, pairs="3", token_cap="", call_cap="", start_chunk="0") -> None:
+		self.pairs_entry = _Entry(pairs)
+		self.token_cap_entry = _Entry(token_cap)
+		self.call_cap_entry = _Entry(call_cap)
+		self.start_chunk_entry = _Entry(start_chunk)
+
+
+@pytest.fixture
+def errors(monkeypatch):
+	shown = []
+	monkeypatch.setattr(ui_app.messagebox, "showerror", lambda title, msg: shown.append(msg))
+	return shown
+
+
+def test_read_numbers_defaults(errors):
+	assert _Form(pairs="", start_chunk="")._read_numbers() == {
+		"pairs": 3, "token_cap": None, "call_cap": None, "start_chunk": 0}
+	assert not errors
+
+
+def test_read_numbers_parses_caps(errors):
+	values = _Form(pairs="5", token_cap="150000", call_cap="40", start_chunk="7")._read_numbers()
+	assert values == {"pairs": 5, "token_cap": 150000, "call_cap": 40, "start_chunk": 7}
+
+
+@pytest.mark.parametrize("field, raw", [
+	("token_cap", "150k"), ("token_cap", "150,000"), ("call_cap", "0"), ("start_chunk", "-1"), ("pairs", "x"),
+])
+def test_read_numbers_rejects_bad_input(errors, field, raw):
+	assert _Form(**{field: raw})._read_numbers() is None
+	assert len(errors) == 1 and repr(raw) in errors[0]
+
+
+class _Var:
+	def __init__(self, value: str = "") -> None:
+		self.value = value
+
+	def get(self) -> str:
+		return self.value
+
+	def set(self, value: str) -> None:
+		self.value = value
+
+
+class _StartEntry:
+	def __init__(self, value: str) -> None:
+		self.value = value
+
+	def get(self) -> str:
+		return self.value
+
+	def delete(self, *_args) -> None:
+		self.value = ""
+
+	def insert(self, _index, text: str) -> None:
+		self.value += text
+
+
+class _DoneForm:
+	_on_generation_done = DatasetApp._on_generation_done
+
+	def __init__(self, tmp_path) -> None:
+		self.status_var = _Var()
+		self.progress_var = _Var()
+		self.output_dir_var = _Var(str(tmp_path))
+		self.compression_var = _Var("none")
+		self.schema_var = _Var("raw")
+		self.start_chunk_entry = _StartEntry("0")
+		self.progress = type("P", (), {"configure": lambda *a, **kw: None})()
+		self.errors = []
+
+	def _set_controls_state(self, state: str) -> None:
+		pass
+
+	def _on_generation_error(self, message: str) -> None:
+		self.errors.append(message)
+
+
+@pytest.fixture
+def quiet_dialogs(monkeypatch):
+	monkeypatch.setattr(ui_app.messagebox, "showinfo", lambda *a: None)
+
+
+@pytest.mark.parametrize("save_as, expected", [("", "0"), ("out.jsonl", "4")])
+def test_resume_point_only_advances_after_save(monkeypatch, tmp_path, quiet_dialogs, save_as, expected):
+	monkeypatch.setattr(ui_app.filedialog, "asksaveasfilename",
+						lambda **kw: str(tmp_path / save_as) if save_as else "")
+	form = _DoneForm(tmp_path)
+	form._on_generation_done([{"input": "q", "output": "a"}], 4)
+	assert form.start_chunk_entry.get() == expected
+
+
+def test_resume_point_kept_when_save_fails(monkeypatch, tmp_path, quiet_dialogs):
+	monkeypatch.setattr(ui_app.filedialog, "asksaveasfilename", lambda **kw: str(tmp_path / "out.jsonl"))
+	monkeypatch.setattr(ui_app.DatasetBuilder, "save_jsonl", staticmethod(lambda *a, **kw: 1 / 0))
+	form = _DoneForm(tmp_path)
+	form._on_generation_done([{"input": "q", "output": "a"}], 4)
+	assert form.errors and form.start_chunk_entry.get() == "0"
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+
+import pytest
+
+from src.dataset.builder import DatasetBuilder
+from src.dataset.writers import SCHEMAS, JsonlSink, convert_jsonl, open_jsonl
+
+from tests.fakes import FakeLLM
+
+
+def _read(path: str) -> list:
+	with open_jsonl(path) as f:
+		return [json.loads(line) for line in f]
+
+
+def _records(n: int) -> list:
+	return [{"input": f"q{i}", "output": f"a{i}"} for i in range(n)]
+
+
+def test_schemas():
+	rec = {"input": "q", "output": "a", "extra": 1}
+	assert SCHEMAS["raw"](rec) == {"input": "q", "output": "a"}
+	assert SCHEMAS["messages"](rec) == {"messages": [
+		{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}]}
+	assert SCHEMAS["alpaca"](rec) == {"instruction": "q", "input": "", "output": "a"}
+	assert SCHEMAS["sharegpt"](rec)["conversations"][1] == {"from": "gpt", "value": "a"}
+
+
+def test_gzip_adds_extension_and_round_trips(tmp_path):
+	paths = DatasetBuilder.save_jsonl(_records(3), str(tmp_path / "out.jsonl"), schema="messages",
+									  compression="gzip")
+	assert paths == [str(tmp_path / "out.jsonl.gz")]
+	with gzip.open(paths[0], "rt", encoding="utf-8") as f:
+		assert json.loads(f.readline())["messages"][0]["content"] == "q0"
+	# An explicit .gz suffix is not doubled
+	assert DatasetBuilder.save_jsonl([], str(tmp_path / "x.jsonl.gz"), compression="gzip") == [
+		str(tmp_path / "x.jsonl.gz")]
+
+
+def test_zstd_round_trips(tmp_path):
+	pytest.importorskip("zstandard")
+	paths = DatasetBuilder.save_jsonl(_records(5), str(tmp_path / "out.jsonl"), compression="zstd")
+	assert paths[0].endswith(".jsonl.zst")
+	assert _read(paths[0]) == _records(5)
+
+
+def test_empty_sink_still_creates_file(tmp_path):
+	paths = DatasetBuilder.save_jsonl([], str(tmp_path / "empty.jsonl"))
+	assert paths == [str(tmp_path / "empty.jsonl")]
+	assert os.path.getsize(paths[0]) == 0
+	with JsonlSink(str(tmp_path / "sharded.jsonl"), max_records=10) as sink:
+		pass
+	assert sink.paths == [str(tmp_path / "sharded-00000.jsonl")]
+	assert os.path.exists(sink.paths[0])
+
+
+def test_rollover_by_record_count(tmp_path):
+	with JsonlSink(str(tmp_path / "data.jsonl"), max_records=4) as sink:
+		for rec in _records(10):
+			sink.write(rec)
+	assert [os.path.basename(p) for p in sink.paths] == [
+		"data-00000.jsonl", "data-00001.jsonl", "data-00002.jsonl"]
+	assert [len(_read(p)) for p in sink.paths] == [4, 4, 2]
+	assert sink.records_written == 10
+
+
+def test_rollover_by_uncompressed_bytes_with_gzip(tmp_path):
+	line_bytes = len(json.dumps(_records(1)[0]) + "\n")
+	with JsonlSink(str(tmp_path / "data.jsonl"), compression="gzip", max_bytes=line_bytes * 5) as sink:
+		for rec in _records(10):
+			sink.write(rec)
+	assert len(sink.paths) == 2
+	assert [len(_read(p)) for p in sink.paths] == [5, 5]
+
+
+def test_compression_inferred_from_suffix(tmp_path):
+	paths = DatasetBuilder.save_jsonl(_records(2), str(tmp_path / "x.jsonl.gz"))
+	assert paths == [str(tmp_path / "x.jsonl.gz")]
+	with gzip.open(paths[0], "rt", encoding="utf-8") as f:
+		assert json.loads(f.readline()) == _records(1)[0]
+	written, _ = convert_jsonl(paths[0], str(tmp_path / "y.jsonl.gz"), workers=1)
+	assert written == 2 and len(_read(str(tmp_path / "y.jsonl.gz"))) == 2
+
+
+def test_suffix_conflicting_with_compression_is_rejected(tmp_path):
+	with pytest.raises(ValueError):
+		JsonlSink(str(tmp_path / "x.jsonl.gz"), compression="zstd")
+
+
+def test_invalid_schema_and_compression(tmp_path):
+	with pytest.raises(ValueError):
+		JsonlSink(str(tmp_path / "a.jsonl"), schema="nope")
+	with pytest.raises(ValueError):
+		JsonlSink(str(tmp_path / "a.jsonl"), compression="bz2")
+
+
+def test_convert_preserves_order_and_counts_skips(tmp_path):
+	src = tmp_path / "in.jsonl.gz"
+	with gzip.open(src, "wt", encoding="utf-8") as f:
+		for i, rec in enumerate(_records(50)):
+			f.write(json.dumps(rec) + "\n")
+			if i % 10 == 0:
+				f.write("{broken\n\n")
+	written, skipped = convert_jsonl(str(src), str(tmp_path / "out.jsonl"), schema="messages",
+									 workers=2, batch_size=3, max_records=20)
+	assert (written, skipped) == (50, 5)
+	out = [rec for p in sorted(tmp_path.glob("out-*.jsonl")) for rec in _read(str(p))]
+	assert [rec["messages"][0]["content"] for rec in out] == [f"q{i}" for i in range(50)]
+
+
+def test_convert_empty_input_creates_output(tmp_path):
+	src = tmp_path / "in.jsonl"
+	src.write_text("")
+	assert convert_jsonl(str(src), str(tmp_path / "out.jsonl"), workers=1) == (0, 0)
+	assert (tmp_path / "out.jsonl").exists()
+
+
+def test_build_to_sink_streams_records(tmp_path, make_docs):
+	builder = DatasetBuilder(FakeLLM())
+	with JsonlSink(str(tmp_path / "out.jsonl"), schema="alpaca") as sink:
+		assert builder.build_to_sink(make_docs(2), sink, num_pairs_per_chunk=2) == 4
+	assert [rec["instruction"] for rec in _read(str(tmp_path / "out.jsonl"))] == ["q1-0", "q1-1", "q2-0", "q2-1"]